@@ -1,14 +1,23 @@
 import streamlit as st
-import cv2
 import json
 import os
 from pathlib import Path
 from datetime import datetime, timedelta
-import google.generativeai as genai
-from PIL import Image
 import io
 import time
 
+from frame_buffers import iter_sampled_frames
+from lazy_init import lazy_import, shared_client
+from structured_analysis import (
+    STRUCTURED_PROMPT, LIST_FIELDS, extract_entities, fallback_log_fields,
+    parse_frame_analysis, to_log_fields
+)
+
+# Heavy modules load on first use - the search and log tabs never need them
+cv2 = lazy_import('cv2')
+genai = lazy_import('google.generativeai')
+Image = lazy_import('PIL.Image')
+
 # Page config
 st.set_page_config(
     page_title="CCTV Footage Analyzer",
@@ -24,24 +33,47 @@ if 'processing_complete' not in st.session_state:
 if 'api_key' not in st.session_state:
     st.session_state.api_key = ""
 
+@shared_client
+def get_gemini_model(api_key, model_name='gemini-2.0-flash-exp'):
+    """One configured model per API key per process"""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
 class CCTVAnalyzer:
-    def __init__(self, api_key, frame_interval=5):
+    PROSE_PROMPT = """You are analyzing CCTV security footage. Describe what's happening in this frame in detail.
+
+Include:
+- Number and description of people (clothing, activities, positions)
+- Vehicles (type, color, actions like parking/moving)
+- Notable objects or activities
+- Any unusual or significant events
+- Overall scene context
+
+Be concise but specific. Focus on security-relevant details."""
+
+    def __init__(self, api_key, frame_interval=5, structured=False):
         """
         Initialize CCTV Analyzer
         
         Args:
             api_key: Google AI Studio API key
             frame_interval: Extract frames every N seconds
+            structured: Ask for schema-validated JSON instead of prose
         """
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.api_key = api_key
         self.frame_interval = frame_interval
+        self.structured = structured
         self.output_dir = Path("output")
         self.output_dir.mkdir(exist_ok=True)
+    
+    @property
+    def model(self):
+        """Gemini model, created on first analysis and shared across reruns"""
+        return get_gemini_model(self.api_key)
         
-    def extract_frames(self, video_path, progress_callback=None):
-        """Extract frames from video at specified intervals"""
-        frames = []
+    def open_video(self, video_path):
+        """Open a video and return (cap, fps, total_frames, frame_interval_frames)"""
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
@@ -49,39 +81,8 @@ class CCTVAnalyzer:
         
         fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps
-        
-        frame_interval_frames = int(fps * self.frame_interval)
-        
-        frame_count = 0
-        extracted_count = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_count % frame_interval_frames == 0:
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                timestamp = frame_count / fps
-                
-                frames.append({
-                    'frame': frame_rgb,
-                    'timestamp': timestamp,
-                    'frame_number': frame_count
-                })
-                
-                extracted_count += 1
-                
-                if progress_callback:
-                    progress = (frame_count / total_frames) * 100
-                    progress_callback(progress, f"Extracted frame at {self.format_timestamp(timestamp)}")
-            
-            frame_count += 1
-        
-        cap.release()
-        return frames, duration
+        frame_interval_frames = max(int(fps * self.frame_interval), 1)
+        return cap, fps, total_frames, frame_interval_frames
     
     def format_timestamp(self, seconds):
         """Format seconds to HH:MM:SS"""
@@ -92,7 +93,12 @@ class CCTVAnalyzer:
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
     
     def analyze_frame(self, frame_data):
-        """Analyze a single frame using Gemini 2.0 Flash"""
+        """
+        Analyze a single frame using Gemini 2.0 Flash
+        
+        frame_data['frame'] must be BGR (as decoded by OpenCV) - it goes
+        straight to cv2.imencode, so RGB input would swap red and blue.
+        """
         try:
             # Fix: Convert numpy array to PIL Image using cv2 encoding
             # This avoids PngImagePlugin issues
@@ -106,29 +112,14 @@ class CCTVAnalyzer:
             # Convert to PIL Image from bytes
             pil_image = Image.open(io.BytesIO(buffer.tobytes()))
             
-            prompt = """You are analyzing CCTV security footage. Describe what's happening in this frame in detail.
-
-Include:
-- Number and description of people (clothing, activities, positions)
-- Vehicles (type, color, actions like parking/moving)
-- Notable objects or activities
-- Any unusual or significant events
-- Overall scene context
-
-Be concise but specific. Focus on security-relevant details."""
-
+            prompt = STRUCTURED_PROMPT if self.structured else self.PROSE_PROMPT
             response = self.model.generate_content([prompt, pil_image])
-            description = response.text
-            
-            # Extract key entities (simple keyword extraction)
-            entities = self.extract_entities(description)
             
             return {
                 'timestamp': self.format_timestamp(frame_data['timestamp']),
                 'timestamp_seconds': frame_data['timestamp'],
                 'frame_number': frame_data['frame_number'],
-                'description': description,
-                'entities': entities,
+                **self.parse_response(response.text),
                 'analyzed_at': datetime.now().isoformat()
             }
         except Exception as e:
@@ -142,50 +133,56 @@ Be concise but specific. Focus on security-relevant details."""
                 'analyzed_at': datetime.now().isoformat()
             }
     
+    def parse_response(self, text):
+        """Turn model output into log fields (description, entities, ...)"""
+        if self.structured:
+            try:
+                analysis, repaired = parse_frame_analysis(text)
+                fields = to_log_fields(analysis)
+                fields['repaired'] = repaired
+                return fields
+            except ValueError as e:
+                # Unusable JSON - keep the raw text and fall back to keywords
+                return fallback_log_fields(text, error=e)
+        
+        # Extract key entities (simple keyword extraction)
+        return fallback_log_fields(text)
+    
     def extract_entities(self, description):
         """Simple keyword extraction for entity recognition"""
         # This is a basic implementation - in production, you'd use NLP
-        keywords = {
-            'person': ['person', 'people', 'man', 'woman', 'individual', 'pedestrian'],
-            'vehicle': ['car', 'vehicle', 'truck', 'bike', 'motorcycle', 'van'],
-            'door': ['door', 'entrance', 'exit', 'gate'],
-            'activity': ['walking', 'running', 'standing', 'sitting', 'entering', 'leaving']
-        }
-        
-        entities = []
-        description_lower = description.lower()
-        
-        for category, words in keywords.items():
-            for word in words:
-                if word in description_lower:
-                    entities.append(category)
-                    break
-        
-        return list(set(entities))
+        return extract_entities(description)
     
     def process_video(self, video_path, progress_callback=None):
         """Complete pipeline: extract frames and analyze"""
         logs = []
         
-        # Extract frames
         if progress_callback:
             progress_callback(0, "Starting frame extraction...")
         
-        frames, duration = self.extract_frames(video_path, progress_callback)
-        
-        total_frames = len(frames)
+        cap, fps, video_frames, frame_interval_frames = self.open_video(video_path)
+        total_frames = max(-(-video_frames // frame_interval_frames), 1)
         
-        # Analyze each frame
-        for idx, frame_data in enumerate(frames):
-            if progress_callback:
-                progress = ((idx + 1) / total_frames) * 100
-                progress_callback(progress, f"Analyzing frame {idx + 1}/{total_frames} at {self.format_timestamp(frame_data['timestamp'])}")
-            
-            log_entry = self.analyze_frame(frame_data)
-            logs.append(log_entry)
-            
-            # Small delay to respect API rate limits
-            time.sleep(0.5)
+        # Decode and analyze one sampled frame at a time (buffers are reused)
+        try:
+            for idx, sampled in enumerate(iter_sampled_frames(cap, frame_interval_frames, fps)):
+                if progress_callback:
+                    progress = min((idx + 1) / total_frames, 1.0) * 100
+                    progress_callback(progress, f"Analyzing frame {idx + 1}/{total_frames} at {self.format_timestamp(sampled.timestamp)}")
+                
+                # cv2.imencode expects BGR, so the decoded frame is used as-is
+                frame_data = {
+                    'frame': sampled.bgr,
+                    'timestamp': sampled.timestamp,
+                    'frame_number': sampled.frame_number
+                }
+                log_entry = self.analyze_frame(frame_data)
+                logs.append(log_entry)
+                
+                # Small delay to respect API rate limits
+                time.sleep(0.5)
+        finally:
+            cap.release()
         
         # Save logs
         self.save_logs(logs)
@@ -211,6 +208,9 @@ Be concise but specific. Focus on security-relevant details."""
             # Search in entities
             elif any(query_lower in entity.lower() for entity in log.get('entities', [])):
                 results.append(log)
+            # Search in structured fields (vehicles, doors, activities)
+            elif any(query_lower in item.lower() for field in LIST_FIELDS for item in log.get(field, [])):
+                results.append(log)
         
         return results
 
@@ -249,6 +249,12 @@ def main():
             help="Extract and analyze frames every N seconds"
         )
         
+        structured = st.checkbox(
+            "Structured JSON output",
+            value=False,
+            help="Ask Gemini for a fixed JSON schema per frame (fewer tokens, no keyword guessing)"
+        )
+        
         st.markdown("---")
         st.markdown("### 📊 Processing Stats")
         if st.session_state.logs:
@@ -278,7 +284,7 @@ def main():
             
             if st.button("🚀 Start Analysis", type="primary"):
                 try:
-                    analyzer = CCTVAnalyzer(api_key, frame_interval)
+                    analyzer = CCTVAnalyzer(api_key, frame_interval, structured)
                     
                     # Progress tracking
                     progress_bar = st.progress(0)
@@ -372,6 +378,10 @@ def main():
                     st.write(f"**Description:**")
                     st.write(log['description'])
                     st.write(f"**Entities:** {', '.join(log['entities']) if log['entities'] else 'None'}")
+                    if log.get('anomaly'):
+                        st.write("**Anomaly:** ⚠️ Flagged by model")
+                    if log.get('structured_error'):
+                        st.write(f"**Structured output rejected:** {log['structured_error']}")
                     st.write(f"**Analyzed at:** {log['analyzed_at']}")
     
     # Footer
@@ -0,0 +1,154 @@
+# Benchmark - Frame Extraction Before/After Decode-Once Buffers
+# Compares the original read-every-frame + cvtColor path with frame_buffers
+
+"""
+Usage:
+    python benchmark_frames.py [video_path] [interval_seconds]
+
+Without a video path a synthetic clip is written to a temp file.
+For each sampled frame both paths produce what downstream steps use:
+a 160px grayscale view (motion scoring / hashing) and, with --rgb,
+a full-resolution RGB view. "before" decodes every frame with cap.read()
+and gets fresh arrays from each OpenCV call. "after" uses frame_buffers.
+Both paths count array allocations with the same AllocationCounter.
+The report also shows peak traced memory and CPU time per sampled frame.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_buffers import FrameBuffers, iter_sampled_frames
+
+
+SMALL_WIDTH = 160
+
+
+def write_synthetic_video(path, seconds=20, fps=30, size=(1280, 720)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    for i in range(seconds * fps):
+        frame = background.copy()
+        x = (i * 7) % (size[0] - 100)
+        frame[300:400, x:x + 100] = (0, 0, 255)  # moving "object"
+        writer.write(frame)
+    writer.release()
+
+
+class AllocationCounter:
+    """
+    Counts arrays handed out per role (decode, rgb, gray, ...)
+
+    Every array an operation returns is observed the same way in both
+    paths: a role counts an allocation whenever it gets a different
+    array object than last time. The previous array is still referenced
+    here, so a new object really is new memory.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._last = {}
+
+    def observe(self, role, array):
+        if self._last.get(role) is not array:
+            self.count += 1
+            self._last[role] = array
+        return array
+
+
+def legacy_path(video_path, interval, want_rgb, counter):
+    """Read every frame with fresh arrays per view (the pre-buffer extract_frames loop)"""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    interval_frames = max(int(fps * interval), 1)
+    sampled = frame_count = 0
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        counter.observe('decode', frame)
+
+        if frame_count % interval_frames == 0:
+            height, width = frame.shape[:2]
+            small_h = max(int(round(height * SMALL_WIDTH / width)), 1)
+            small = counter.observe('small_bgr', cv2.resize(
+                frame, (SMALL_WIDTH, small_h), interpolation=cv2.INTER_AREA))
+            counter.observe('gray_small', cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+            if want_rgb:
+                counter.observe('rgb', cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            sampled += 1
+        frame_count += 1
+
+    cap.release()
+    return sampled
+
+
+def buffered_path(video_path, interval, want_rgb, counter):
+    """Decode-once path with lazy views in reusable buffers"""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    buffers = FrameBuffers(small_width=SMALL_WIDTH)
+    sampled = 0
+
+    for frame in iter_sampled_frames(cap, fps * interval, fps, buffers):
+        counter.observe('decode', frame.bgr)
+        counter.observe('gray_small', frame.gray_small())
+        counter.observe('small_bgr', buffers.peek('small_bgr'))
+        if want_rgb:
+            counter.observe('rgb', frame.rgb())
+        sampled += 1
+
+    cap.release()
+    return sampled
+
+
+def measure(path_fn, video_path, interval, want_rgb):
+    tracemalloc.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    counter = AllocationCounter()
+    sampled = path_fn(video_path, interval, want_rgb, counter)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'sampled_frames': sampled,
+        'array_allocations': counter.count,
+        'peak_traced_mb': peak / 1e6,
+        'cpu_ms_per_frame': cpu / sampled * 1000,
+        'wall_s': wall,
+    }
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if a != '--rgb']
+    want_rgb = '--rgb' in sys.argv
+    interval = float(args[1]) if len(args) > 1 else 1.0
+
+    if args:
+        video_path, cleanup = args[0], False
+    else:
+        video_path = os.path.join(tempfile.mkdtemp(prefix='cctv-bench-'), 'synthetic.mp4')
+        write_synthetic_video(video_path)
+        cleanup = True
+
+    try:
+        before = measure(legacy_path, video_path, interval, want_rgb)
+        after = measure(buffered_path, video_path, interval, want_rgb)
+    finally:
+        if cleanup:
+            os.remove(video_path)
+            os.rmdir(os.path.dirname(video_path))
+
+    print(f"{video_path if not cleanup else 'synthetic 1280x720 clip'}, "
+          f"every {interval}s{' + RGB view' if want_rgb else ''}\n")
+    print(f"{'':<20}{'before':>12}{'after':>12}")
+    for key in ('sampled_frames', 'array_allocations', 'peak_traced_mb',
+                'cpu_ms_per_frame', 'wall_s'):
+        print(f'{key:<20}{before[key]:>12.2f}{after[key]:>12.2f}')
@@ -0,0 +1,119 @@
+# Benchmark - Structured JSON vs Prose Analysis Mode
+# Replays recorded Gemini responses, so no API key or network is needed
+
+"""
+Usage:
+    python benchmark_structured.py [frames] [ms_per_output_token]
+
+The stub model sleeps for a fixed base latency plus a per-output-token
+cost, which is how generation latency scales in practice. Reports
+response size and end-to-end analyze_frame latency (encode, model call,
+parsing / entity extraction) for both modes.
+"""
+
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app import CCTVAnalyzer
+from structured_analysis import STRUCTURED_PROMPT
+
+
+BASE_LATENCY = 0.050  # seconds, time to first token
+
+# Recorded responses to the prototype prompt and to STRUCTURED_PROMPT
+PROSE_RESPONSES = [
+    """The frame shows a parking lot outside a commercial building during daylight. Two people are visible near the main entrance: a man in a dark blue jacket and jeans walking toward the door, and a woman in a red coat standing to the left of the entrance holding a phone. A silver sedan is parked in the second row, and a white delivery van is slowly moving through the lane toward the exit gate. The glass entrance door appears to be closed. No unusual or suspicious activity is observed; the scene reflects normal foot and vehicle traffic.""",
+    """This is an indoor corridor camera view. One individual wearing a grey hoodie and a backpack is walking away from the camera toward a side exit. The exit door at the end of the corridor is propped open, which may be notable for security purposes. There are no vehicles in view. Lighting is consistent and no other people are present. Overall the scene is quiet, but the open exit door could warrant attention.""",
+    """The camera shows an empty loading dock at night. A black pickup truck is parked with its tailgate down next to the roll-up door, which is partially open. No people are visible in the frame. The area is lit by a single overhead light. The combination of a partially open dock door and an unattended vehicle after hours could be considered unusual and may require review.""",
+]
+
+STRUCTURED_RESPONSES = [
+    '{"people_count":2,"vehicles":["silver sedan parked","white van moving"],"doors":["main entrance closed"],'
+    '"activities":["walking","standing"],"anomaly":false,"summary":"Two people near entrance, sedan parked, van driving to exit gate."}',
+    '{"people_count":1,"vehicles":[],"doors":["side exit propped open"],"activities":["walking"],'
+    '"anomaly":true,"summary":"Person with backpack walks toward propped-open side exit."}',
+    # Malformed on purpose: code fence and trailing comma exercise the repair path
+    '```json\n{"people_count":0,"vehicles":["black pickup parked"],"doors":["dock door partially open"],'
+    '"activities":[],"anomaly":true,"summary":"Unattended pickup at partially open loading dock after hours.",}\n```',
+]
+
+
+class RecordedModel:
+    """Stand-in for genai.GenerativeModel that replays recorded responses"""
+
+    def __init__(self, seconds_per_token):
+        self.seconds_per_token = seconds_per_token
+        self.calls = 0
+
+    def generate_content(self, contents):
+        prompt = contents[0]
+        responses = STRUCTURED_RESPONSES if prompt == STRUCTURED_PROMPT else PROSE_RESPONSES
+        text = responses[self.calls % len(responses)]
+        self.calls += 1
+        time.sleep(BASE_LATENCY + approx_tokens(text) * self.seconds_per_token)
+        return SimpleNamespace(text=text)
+
+
+class BenchmarkAnalyzer(CCTVAnalyzer):
+    model = None
+
+
+def approx_tokens(text):
+    """~4 characters per token for English text and JSON"""
+    return max(len(text) // 4, 1)
+
+
+def run(structured, frames, seconds_per_token):
+    analyzer = BenchmarkAnalyzer('benchmark', structured=structured)
+    analyzer.model = RecordedModel(seconds_per_token)
+    image = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    latencies, repaired, errors = [], 0, []
+    for i in range(frames):
+        frame_data = {'frame': image, 'timestamp': i * 5.0, 'frame_number': i * 150}
+        start = time.perf_counter()
+        log = analyzer.analyze_frame(frame_data)
+        latencies.append(time.perf_counter() - start)
+        repaired += bool(log.get('repaired'))
+        # analyze_frame swallows exceptions into an error entry
+        if log['description'].startswith('Error analyzing frame'):
+            errors.append(log['description'])
+
+    latencies.sort()
+    prompt = STRUCTURED_PROMPT if structured else CCTVAnalyzer.PROSE_PROMPT
+    responses = STRUCTURED_RESPONSES if structured else PROSE_RESPONSES
+    return {
+        'prompt_tokens': approx_tokens(prompt),
+        'response_chars': statistics.mean(len(r) for r in responses),
+        'response_tokens': statistics.mean(approx_tokens(r) for r in responses),
+        'latency_mean_ms': statistics.mean(latencies) * 1000,
+        'latency_p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'repaired': repaired,
+        'errors': errors,
+    }
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    ms_per_token = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    prose = run(False, frames, ms_per_token / 1000)
+    structured = run(True, frames, ms_per_token / 1000)
+
+    failed = prose['errors'] + structured['errors']
+    if failed:
+        # Timings of failed calls are meaningless - don't print a table
+        print(f'{len(failed)} of {2 * frames} analyze_frame calls failed, e.g.: {failed[0]}')
+        sys.exit(1)
+
+    print(f'{frames} frames, {BASE_LATENCY * 1000:.0f}ms base + {ms_per_token}ms/output token\n')
+    print(f"{'':<22}{'prose':>10}{'structured':>12}{'change':>10}")
+    for key in ('prompt_tokens', 'response_chars', 'response_tokens',
+                'latency_mean_ms', 'latency_p95_ms'):
+        change = (structured[key] - prose[key]) / prose[key] * 100
+        print(f'{key:<22}{prose[key]:>10.1f}{structured[key]:>12.1f}{change:>9.1f}%')
+    print(f"\nStructured responses repaired: {structured['repaired']}/{frames}")
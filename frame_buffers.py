@@ -0,0 +1,108 @@
+# Frame Buffers - Decode Once, Derive Views Lazily, Reuse Arrays
+# Sampled frames share preallocated buffers instead of fresh arrays per frame
+
+"""
+MULTI-RESOLUTION FRAMES OVERVIEW
+================================
+
+1. cap.grab() on every frame (cheap - no copy out of the decoder)
+   ↓
+2. cap.retrieve() only on sampled frames, into one reused BGR buffer
+   ↓
+3. SampledFrame views, computed on first request:
+   - bgr           decoded frame (what cv2.imencode expects)
+   - gray_small()  low-res grayscale (motion scoring, hashing, thumbnails)
+   - rgb()         full-res RGB (PIL / other RGB consumers)
+
+Views live in shared buffers and are overwritten by the next frame.
+Call .copy() on anything that must outlive the iteration.
+"""
+
+from lazy_init import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+class FrameBuffers:
+    """Arrays reused across every sampled frame of one video"""
+
+    def __init__(self, small_width=160):
+        self.small_width = small_width
+        self.allocations = 0
+        self._arrays = {}
+
+    def get(self, name, shape, dtype='uint8'):
+        """Buffer of the given shape, allocated only on first use or resize"""
+        array = self._arrays.get(name)
+        if array is None or array.shape != shape:
+            array = np.empty(shape, dtype=dtype)
+            self._arrays[name] = array
+            self.allocations += 1
+        return array
+
+    def adopt(self, name, array):
+        """Keep an array produced elsewhere (e.g. by the decoder) for reuse"""
+        if self._arrays.get(name) is not array:
+            self._arrays[name] = array
+            self.allocations += 1
+        return array
+
+    def peek(self, name):
+        return self._arrays.get(name)
+
+
+class SampledFrame:
+    """One decoded frame plus lazily derived views"""
+
+    def __init__(self, bgr, buffers, timestamp, frame_number):
+        self.bgr = bgr
+        self.timestamp = timestamp
+        self.frame_number = frame_number
+        self._buffers = buffers
+        self._rgb = None
+        self._gray_small = None
+
+    def rgb(self):
+        """Full-resolution RGB view"""
+        if self._rgb is None:
+            dst = self._buffers.get('rgb', self.bgr.shape)
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB, dst=dst)
+        return self._rgb
+
+    def gray_small(self):
+        """Low-resolution grayscale view (small_width wide, aspect preserved)"""
+        if self._gray_small is None:
+            height, width = self.bgr.shape[:2]
+            small_w = min(self._buffers.small_width, width)
+            small_h = max(int(round(height * small_w / width)), 1)
+            small = cv2.resize(
+                self.bgr, (small_w, small_h),
+                dst=self._buffers.get('small_bgr', (small_h, small_w, 3)),
+                interpolation=cv2.INTER_AREA
+            )
+            self._gray_small = cv2.cvtColor(
+                small, cv2.COLOR_BGR2GRAY,
+                dst=self._buffers.get('gray_small', (small_h, small_w))
+            )
+        return self._gray_small
+
+
+def iter_sampled_frames(cap, interval_frames, fps, buffers=None):
+    """
+    Yield a SampledFrame every interval_frames frames
+
+    Each yielded frame is only valid until the next one is requested.
+    """
+    buffers = buffers or FrameBuffers()
+    interval_frames = max(int(interval_frames), 1)
+    frame_number = 0
+
+    while cap.grab():
+        if frame_number % interval_frames == 0:
+            ok, bgr = cap.retrieve(buffers.peek('bgr'))
+            if not ok:
+                break
+            buffers.adopt('bgr', bgr)
+            yield SampledFrame(bgr, buffers, frame_number / fps, frame_number)
+        frame_number += 1
@@ -0,0 +1,487 @@
+# Local Job Queue - Self-Hosted Replacement for Cloud Tasks + Firestore Jobs
+# Lets the processing pipeline run (and be load-tested) without GCP
+
+"""
+LOCAL JOB QUEUE OVERVIEW
+========================
+
+1. API ENQUEUES JOB
+   ↓
+2. SQLITE (durable job state, survives restarts)
+   ↓
+3. WORKER POOL (multiprocessing, one claim at a time per worker)
+   ↓
+4. PIPELINE (download → extract frames → analyze → store logs)
+   ↓
+5. JOB STATUS (progress percentage + ETA for polling clients)
+
+Queue semantics (mirrors the Cloud Tasks config in production_architecture.py):
+- Higher priority jobs are claimed first, FIFO within a priority
+- Per-user concurrency limit so one user can't starve the pool
+- Claimed jobs hold a lease (visibility timeout); workers extend it
+  whenever they report progress
+- Expired leases go back to the queue, failures retry with backoff,
+  and jobs give up after max_attempts
+
+Job state lives in one SQLite file, so local mode is for a single host
+(API and workers sharing a disk) - Cloud Run deployments keep Cloud Tasks.
+
+Run workers alongside the API (any WSGI server):
+    JOB_QUEUE_MODE=local python job_queue.py production_architecture:run_video_job --processes 4
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker_id TEXT,
+    frames_done INTEGER NOT NULL DEFAULT 0,
+    total_frames INTEGER,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    attempt_started_at REAL,
+    lease_expires_at REAL,
+    updated_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim
+    ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_user_status
+    ON jobs (user_id, status);
+"""
+
+
+class LeaseLost(Exception):
+    """The worker's lease expired and the job was handed to someone else"""
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue
+
+    Every call opens its own connection, so one JobQueue can be shared
+    by API threads and the same db_path can be opened from worker
+    processes.
+    """
+
+    def __init__(self, db_path='jobs.db', visibility_timeout=300,
+                 max_attempts=3, max_jobs_per_user=2, retry_backoff=10):
+        """
+        Args:
+            db_path: SQLite database file
+            visibility_timeout: Seconds a claimed job stays invisible
+                before another worker may pick it up again
+            max_attempts: Attempts before a job is marked failed
+            max_jobs_per_user: Running jobs allowed per user at once
+            retry_backoff: Base retry delay in seconds (doubles per attempt)
+        """
+        self.db_path = str(db_path)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.max_jobs_per_user = max_jobs_per_user
+        self.retry_backoff = retry_backoff
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, db_path=None):
+        """Queue configured from JOB_QUEUE_DB, JOB_VISIBILITY_TIMEOUT, ... env vars"""
+        return cls(
+            db_path or os.environ.get('JOB_QUEUE_DB', 'jobs.db'),
+            visibility_timeout=int(os.environ.get('JOB_VISIBILITY_TIMEOUT', 300)),
+            max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 3)),
+            max_jobs_per_user=int(os.environ.get('MAX_JOBS_PER_USER', 2))
+        )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction - BEGIN IMMEDIATE serializes claims across processes"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    # --------------------------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------------------------
+
+    def enqueue(self, user_id, payload, priority=0, max_attempts=None, job_id=None):
+        """Add a job and return its job_id (generated unless given)"""
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """INSERT INTO jobs (job_id, user_id, payload, priority, status,
+                                     max_attempts, created_at, available_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, str(user_id), json.dumps(payload), int(priority), QUEUED,
+                 max_attempts or self.max_attempts, now, now, now)
+            )
+        return job_id
+
+    def get_status(self, job_id):
+        """
+        Job status for polling clients
+
+        Returns None for unknown jobs. Includes progress percentage,
+        ETA (seconds, running jobs only) and queue wait time.
+        """
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        status = {
+            'job_id': row['job_id'],
+            'user_id': row['user_id'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'attempts': row['attempts'],
+            'frames_done': row['frames_done'],
+            'total_frames': row['total_frames'],
+            'progress': _progress(row),
+            'eta_seconds': _eta(row, now),
+            'queue_wait_seconds': _queue_wait(row, now),
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'completed_at': row['completed_at'],
+        }
+        if row['result'] is not None:
+            status['result'] = json.loads(row['result'])
+        if row['error'] is not None:
+            status['error'] = row['error']
+        return status
+
+    def stats(self):
+        """Job counts by status plus queueing latency of started jobs"""
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                'SELECT status, COUNT(*) FROM jobs GROUP BY status'
+            ).fetchall())
+            waits = [r[0] for r in conn.execute(
+                'SELECT started_at - created_at FROM jobs '
+                'WHERE started_at IS NOT NULL ORDER BY 1'
+            ).fetchall()]
+
+        return {
+            'counts': {s: counts.get(s, 0) for s in (QUEUED, RUNNING, COMPLETED, FAILED)},
+            'queue_wait_p50': _percentile(waits, 50),
+            'queue_wait_p95': _percentile(waits, 95),
+            'queue_wait_max': waits[-1] if waits else None,
+        }
+
+    # --------------------------------------------------------------------------
+    # Worker side
+    # --------------------------------------------------------------------------
+
+    def claim(self, worker_id):
+        """
+        Lease the next runnable job
+
+        Returns (job_id, payload) or None when nothing is runnable.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._reap_expired(conn, now)
+            row = conn.execute(
+                """SELECT job_id, payload FROM jobs AS j
+                   WHERE j.status = ? AND j.available_at <= ?
+                     AND (SELECT COUNT(*) FROM jobs AS r
+                          WHERE r.user_id = j.user_id AND r.status = ?) < ?
+                   ORDER BY j.priority DESC, j.created_at
+                   LIMIT 1""",
+                (QUEUED, now, RUNNING, self.max_jobs_per_user)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                """UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1,
+                                   started_at = COALESCE(started_at, ?),
+                                   attempt_started_at = ?, frames_done = 0,
+                                   lease_expires_at = ?, updated_at = ?
+                   WHERE job_id = ?""",
+                (RUNNING, worker_id, now, now, now + self.visibility_timeout, now,
+                 row['job_id'])
+            )
+        return row['job_id'], json.loads(row['payload'])
+
+    def update_progress(self, job_id, worker_id, frames_done, total_frames=None):
+        """
+        Record progress and extend the lease
+
+        Returns False if the worker no longer owns the job (lease expired
+        and the job was handed to someone else).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET frames_done = ?,
+                                   total_frames = COALESCE(?, total_frames),
+                                   lease_expires_at = ?, updated_at = ?
+                   WHERE job_id = ? AND worker_id = ? AND status = ?""",
+                (frames_done, total_frames, now + self.visibility_timeout, now,
+                 job_id, worker_id, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result=None):
+        """Mark a leased job as completed"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = ?, result = ?, error = NULL,
+                                   frames_done = COALESCE(total_frames, frames_done),
+                                   lease_expires_at = NULL, completed_at = ?, updated_at = ?
+                   WHERE job_id = ? AND worker_id = ? AND status = ?""",
+                (COMPLETED, json.dumps(result), now, now, job_id, worker_id, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error):
+        """Record a failed attempt - requeue with backoff or give up"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT attempts, max_attempts FROM jobs '
+                'WHERE job_id = ? AND worker_id = ? AND status = ?',
+                (job_id, worker_id, RUNNING)
+            ).fetchone()
+            if row is None:
+                return False
+            self._retry_or_fail(conn, job_id, row['attempts'], row['max_attempts'],
+                                str(error), now)
+        return True
+
+    def _reap_expired(self, conn, now):
+        """Return jobs whose lease expired (worker died or hung) to the queue"""
+        expired = conn.execute(
+            'SELECT job_id, attempts, max_attempts FROM jobs '
+            'WHERE status = ? AND lease_expires_at < ?',
+            (RUNNING, now)
+        ).fetchall()
+        for row in expired:
+            self._retry_or_fail(conn, row['job_id'], row['attempts'], row['max_attempts'],
+                                'Visibility timeout expired', now)
+
+    def _retry_or_fail(self, conn, job_id, attempts, max_attempts, error, now):
+        if attempts >= max_attempts:
+            conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, worker_id = NULL,
+                                   lease_expires_at = NULL, completed_at = ?, updated_at = ?
+                   WHERE job_id = ?""",
+                (FAILED, error, now, now, job_id)
+            )
+        else:
+            delay = self.retry_backoff * (2 ** (attempts - 1))
+            conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, worker_id = NULL,
+                                   lease_expires_at = NULL, available_at = ?, updated_at = ?
+                   WHERE job_id = ?""",
+                (QUEUED, error, now + delay, now, job_id)
+            )
+
+
+# ==============================================================================
+# Worker Pool
+# ==============================================================================
+
+class WorkerPool:
+    """
+    Multiprocessing workers that drain a JobQueue
+
+    handler(payload, report_progress) runs one job and returns a
+    JSON-serializable result. report_progress(frames_done, total_frames)
+    updates the job and keeps its lease alive; it raises LeaseLost once
+    the job has been handed to another worker, so the handler stops
+    instead of writing duplicate results. handler must be importable
+    at module level so it can be sent to worker processes.
+
+    use_threads=True runs the workers as threads in this process instead
+    (load tests and anything else relying on in-process fakes).
+
+    Queue errors (e.g. SQLite still locked after its busy timeout) are
+    logged and retried with backoff; they never end a worker.
+    """
+
+    def __init__(self, queue, handler, processes=None, poll_interval=0.5,
+                 use_threads=False):
+        self.queue = queue
+        self.handler = handler
+        self.processes = processes or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.use_threads = use_threads
+        self._stop_event = threading.Event() if use_threads else multiprocessing.Event()
+        self._workers = []
+
+    def start(self):
+        worker_cls = threading.Thread if self.use_threads else multiprocessing.Process
+        for i in range(self.processes):
+            worker_id = f'{os.getpid()}-{i}-{uuid.uuid4().hex[:6]}'
+            worker = worker_cls(
+                target=_worker_loop,
+                args=(self.queue, self.handler, worker_id,
+                      self._stop_event, self.poll_interval),
+                name=f'job-worker-{i}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def stop(self, timeout=None):
+        """Stop claiming new jobs and wait for running ones to finish"""
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _worker_loop(queue, handler, worker_id, stop_event, poll_interval, max_backoff=30):
+    errors = 0  # consecutive queue errors, for backoff
+
+    while not stop_event.is_set():
+        try:
+            claimed = queue.claim(worker_id)
+        except Exception:
+            errors += 1
+            logger.exception('Worker %s could not claim a job', worker_id)
+            stop_event.wait(min(poll_interval * 2 ** errors, max_backoff))
+            continue
+        if claimed is None:
+            errors = 0
+            stop_event.wait(poll_interval)
+            continue
+
+        job_id, payload = claimed
+
+        def report_progress(frames_done, total_frames=None):
+            if not queue.update_progress(job_id, worker_id, frames_done, total_frames):
+                raise LeaseLost(job_id)
+
+        try:
+            result = handler(payload, report_progress)
+        except LeaseLost:
+            # Another worker owns the job now - leave its state alone
+            continue
+        except Exception:
+            finish, args = queue.fail, (traceback.format_exc(limit=5),)
+        else:
+            finish, args = queue.complete, (result,)
+
+        try:
+            finish(job_id, worker_id, *args)
+            errors = 0
+        except Exception:
+            # The lease expires and the job is retried (log writes are idempotent)
+            errors += 1
+            logger.exception('Worker %s could not record the outcome of job %s',
+                             worker_id, job_id)
+            stop_event.wait(min(poll_interval * 2 ** errors, max_backoff))
+
+
+# Helper functions
+def _progress(row):
+    if row['status'] == COMPLETED:
+        return 100.0
+    if not row['total_frames']:
+        return 0.0
+    return round(min(row['frames_done'] / row['total_frames'], 1.0) * 100, 1)
+
+
+def _eta(row, now):
+    """Seconds remaining, extrapolated from this attempt's frame rate"""
+    if row['status'] != RUNNING or not row['total_frames'] or not row['frames_done']:
+        return None
+    elapsed = now - row['attempt_started_at']
+    remaining = max(row['total_frames'] - row['frames_done'], 0)
+    return round(elapsed / row['frames_done'] * remaining, 1)
+
+
+def _queue_wait(row, now):
+    if row['started_at'] is None:
+        return round(now - row['created_at'], 3)
+    return round(row['started_at'] - row['created_at'], 3)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run local job queue workers')
+    parser.add_argument('handler', nargs='?', default='production_architecture:run_video_job',
+                        help='module:function that runs one job')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(message)s')
+    module_name, func_name = args.handler.split(':')
+    handler = getattr(importlib.import_module(module_name), func_name)
+
+    pool = WorkerPool(JobQueue.from_env(), handler, processes=args.processes,
+                      poll_interval=args.poll_interval).start()
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    try:
+        stopping.wait()
+    except KeyboardInterrupt:
+        pass
+    pool.stop()
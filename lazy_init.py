@@ -0,0 +1,202 @@
+# Lazy Initialization - Fast Startup for Streamlit Reruns and Cold Containers
+# Heavy imports and cloud clients are created on first use, not at import time
+
+"""
+LAZY INITIALIZATION OVERVIEW
+============================
+
+1. lazy_import('cv2')
+   Module proxy - the real import happens on first attribute access
+
+2. @shared_client
+   Thread-safe, per-process client pool - one instance per factory
+   (and per arguments), created on first call, recreated after fork
+   so worker processes never inherit gRPC/HTTP connections
+
+3. python lazy_init.py production_architecture
+   Startup report: -X importtime breakdown plus cold-start time to
+   first served request, next to an eager-import baseline
+"""
+
+import functools
+import importlib
+import os
+import subprocess
+import sys
+import threading
+
+
+# ==============================================================================
+# Lazy Imports
+# ==============================================================================
+
+class _LazyModule:
+    """Stands in for a module until one of its attributes is needed"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name):
+    """Return the module if already imported, otherwise a lazy proxy for it"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
+
+
+# ==============================================================================
+# Shared Client Pool
+# ==============================================================================
+
+_pool = {}
+_pool_lock = threading.Lock()
+_pool_pid = os.getpid()
+
+
+def shared_client(factory):
+    """
+    Decorator: create the client on first call, then reuse it
+
+    Instances are keyed by factory and arguments, so
+    get_model('key-a') and get_model('key-b') are pooled separately.
+    The pool is dropped in a forked child (clients aren't fork-safe).
+    """
+    @functools.wraps(factory)
+    def get(*args, **kwargs):
+        global _pool_pid
+        key = (factory.__module__, factory.__qualname__, args, tuple(sorted(kwargs.items())))
+        client = _pool.get(key)
+        if client is not None and _pool_pid == os.getpid():
+            return client
+
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool.clear()
+                _pool_pid = os.getpid()
+            client = _pool.get(key)
+            if client is None:
+                client = factory(*args, **kwargs)
+                _pool[key] = client
+        return client
+
+    get.uncached = factory
+    return get
+
+
+def reset_clients():
+    """Drop every pooled client (tests, credential rotation)"""
+    with _pool_lock:
+        _pool.clear()
+
+
+# ==============================================================================
+# Startup Report
+# ==============================================================================
+
+def import_time_report(module, top=15):
+    """
+    Run `python -X importtime -c "import <module>"` in a fresh interpreter
+
+    Returns (total_seconds, rows) where rows are
+    (cumulative_seconds, self_seconds, module_name), slowest first.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, name.rstrip()))
+
+    total = next((r[0] for r in reversed(rows) if r[2].strip() == module), None)
+    rows.sort(reverse=True)
+    return total, rows[:top]
+
+
+# What production_architecture.py and app.py imported eagerly before lazy init
+HEAVY_MODULES = (
+    'cv2',
+    'PIL.Image',
+    'google.generativeai',
+    'google.cloud.storage',
+    'google.cloud.firestore',
+    'google.cloud.tasks_v2',
+)
+
+
+def cold_start_time(module, path, attr='app', eager=False):
+    """
+    Seconds from interpreter start to the first response served by a
+    Flask app (via its test client), measured in a fresh process
+
+    eager=True first imports every installed HEAVY_MODULES entry,
+    reproducing the old import-time initialization as a baseline.
+    """
+    preload = ''
+    if eager:
+        preload = (
+            f'for name in {HEAVY_MODULES!r}:\n'
+            '    try:\n'
+            '        __import__(name)\n'
+            '    except ImportError:\n'
+            '        pass\n'
+        )
+    code = (
+        'import time; start = time.perf_counter()\n'
+        + preload +
+        f'import {module}\n'
+        f'response = {module}.{attr}.test_client().get({path!r})\n'
+        'print(time.perf_counter() - start, response.status_code)\n'
+    )
+    proc = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    elapsed, status = proc.stdout.split()
+    return float(elapsed), int(status)
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else 'production_architecture'
+
+    total, rows = import_time_report(target)
+    print(f'Import time for {target}: {total:.3f}s' if total else f'Import of {target} failed')
+    print(f"{'cumulative':>12}  {'self':>10}  module")
+    for cumulative, self_time, name in rows:
+        print(f'{cumulative:>11.3f}s  {self_time:>9.3f}s  {name}')
+
+    if target == 'production_architecture':
+        lazy, status = cold_start_time(target, '/healthz')
+        eager, _ = cold_start_time(target, '/healthz', eager=True)
+        print(f'\nCold start to first request: {lazy:.3f}s lazy vs {eager:.3f}s eager '
+              f'baseline (HTTP {status})')
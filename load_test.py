@@ -0,0 +1,484 @@
+# Load Test Harness - Flask API with In-Process Stand-Ins for GCP
+# Reproducible latency/throughput baseline for production_architecture.py
+
+"""
+LOAD TEST OVERVIEW
+==================
+
+1. FAKES (storage, Firestore, Cloud Tasks, Gemini, a throwaway job
+   queue) replace the lazy client getters in production_architecture
+   for the duration of the run - everything is restored afterwards
+   ↓
+2. FLASK APP served by a threaded werkzeug server on a local port
+   (optionally with the local job queue drained by worker threads)
+   ↓
+3. VIRTUAL USERS (one thread each) pick upload / job-status / search
+   requests according to the traffic mix (a status pick before the user
+   has uploaded anything is sent as an upload and counted separately)
+   ↓
+4. REPORT: p50/p95/p99 latency, throughput and error rate per endpoint,
+   plus queue wait from the local job queue
+
+Usage:
+    python load_test.py --concurrency 50 --duration 30 --mix upload=1,status=6,search=3
+    python load_test.py --queue-mode cloud-tasks   # tasks are recorded, never run
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from types import SimpleNamespace
+
+
+# ==============================================================================
+# In-Process Fakes
+# ==============================================================================
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.public_url = f'https://storage.googleapis.com/{bucket.name}/{name}'
+
+    def upload_from_file(self, file):
+        with self.bucket.lock:
+            self.bucket.objects[self.name] = file.read()
+
+    def download_to_filename(self, filename):
+        # Lenient on purpose: frame extraction is faked, contents don't matter
+        with self.bucket.lock:
+            data = self.bucket.objects.get(self.name, b'')
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+
+class FakeBucket:
+    def __init__(self, name):
+        self.name = name
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+class FakeStorageClient:
+    """Stand-in for google.cloud.storage.Client"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name):
+        with self._lock:
+            return self._buckets.setdefault(name, FakeBucket(name))
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = dict(data) if data is not None else None
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self._db = db
+        self._path = path
+
+    def collection(self, name):
+        return FakeCollection(self._db, self._path + (name,))
+
+    def get(self):
+        with self._db.lock:
+            return FakeSnapshot(self._path[-1], self._db.documents.get(self._path))
+
+    def set(self, data):
+        with self._db.lock:
+            self._db.documents[self._path] = dict(data)
+
+    def update(self, data):
+        with self._db.lock:
+            self._db.documents.setdefault(self._path, {}).update(data)
+
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self._db = db
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self._db, self._path + (doc_id,))
+
+    def add(self, data):
+        doc = self.document(uuid.uuid4().hex)
+        doc.set(data)
+        return None, doc
+
+    def stream(self):
+        with self._db.lock:
+            docs = [FakeSnapshot(path[-1], data) for path, data in self._db.documents.items()
+                    if len(path) == len(self._path) + 1 and path[:-1] == self._path]
+        return iter(docs)
+
+
+class FakeFirestore:
+    """Stand-in for google.cloud.firestore.Client (flat path -> dict store)"""
+
+    def __init__(self):
+        self.documents = {}
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, (name,))
+
+
+class FakeTasksClient:
+    """Stand-in for tasks_v2.CloudTasksClient - records tasks, never dispatches"""
+
+    def __init__(self):
+        self.tasks = []
+        self._lock = threading.Lock()
+
+    def queue_path(self, project, location, queue):
+        return f'projects/{project}/locations/{location}/queues/{queue}'
+
+    def create_task(self, request):
+        name = f"{request['parent']}/tasks/{uuid.uuid4().hex}"
+        with self._lock:
+            self.tasks.append(request)
+        return SimpleNamespace(name=name)
+
+
+# Stand-in for the google.cloud.tasks_v2 module (upload_video reads HttpMethod from it)
+FAKE_TASKS_V2 = SimpleNamespace(
+    CloudTasksClient=FakeTasksClient,
+    HttpMethod=SimpleNamespace(POST='POST'),
+)
+
+
+class FakeModel:
+    """Stand-in for genai.GenerativeModel with a fixed response latency"""
+
+    RESPONSE = json.dumps({
+        'people_count': 1, 'vehicles': ['white van parked'], 'doors': ['gate open'],
+        'activities': ['walking'], 'anomaly': False,
+        'summary': 'One person walking past a parked white van near the open gate.'
+    })
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, contents):
+        time.sleep(self.latency)
+        return SimpleNamespace(text=self.RESPONSE)
+
+
+SEARCH_QUERIES = ['person', 'van', 'gate', 'walking', 'vehicle', 'door', 'nothing-matches']
+
+
+# production_architecture globals replaced by install_fakes()
+PATCHED = ('get_storage_client', 'get_firestore', 'get_tasks_client', 'get_model',
+           'get_job_queue', 'extract_frames', 'tasks_v2', 'JOB_QUEUE_MODE')
+
+
+def install_fakes(pa, queue_mode, job_queue_db, model_latency, frames_per_job,
+                  seed_logs, users):
+    """
+    Swap production_architecture's clients for fakes
+
+    Returns the fakes; call .restore() to put the originals back.
+    """
+    from job_queue import JobQueue
+
+    storage, db, tasks = FakeStorageClient(), FakeFirestore(), FakeTasksClient()
+    model = FakeModel(model_latency)
+    queue = JobQueue.from_env(job_queue_db)
+    originals = {name: getattr(pa, name) for name in PATCHED}
+
+    pa.get_storage_client = lambda: storage
+    pa.get_firestore = lambda: db
+    pa.get_tasks_client = lambda: tasks
+    pa.get_model = lambda: model
+    pa.get_job_queue = lambda: queue
+    pa.extract_frames = lambda video_path, frame_interval: [
+        {'timestamp': i * frame_interval, 'frame_number': i, 'image': None}
+        for i in range(frames_per_job)
+    ]
+    pa.tasks_v2 = FAKE_TASKS_V2
+    pa.JOB_QUEUE_MODE = queue_mode
+
+    # Pre-populate logs so search has something to scan from the first request
+    rng = random.Random(0)
+    for user_id in users:
+        logs = db.collection('users').document(user_id).collection('logs')
+        for i in range(seed_logs):
+            logs.add({'timestamp': i * 5, 'description': rng.choice([
+                'Person walking past the gate', 'White van parked by the door',
+                'Empty parking lot', 'Two people entering the building'
+            ])})
+
+    def restore():
+        for name, value in originals.items():
+            setattr(pa, name, value)
+
+    return SimpleNamespace(storage=storage, db=db, tasks=tasks, model=model,
+                           queue=queue, restore=restore)
+
+
+# ==============================================================================
+# Virtual Users
+# ==============================================================================
+
+class Recorder:
+    """Thread-safe per-endpoint latency and error collection"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.substitutions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def substitute(self, picked, sent):
+        """A mix pick that couldn't be sent as-is (e.g. status with no job yet)"""
+        with self._lock:
+            self.substitutions[f'{picked}->{sent}'] += 1
+
+    def record(self, endpoint, seconds, error=None):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if error is not None:
+                self.errors[endpoint] += 1
+                self.error_samples.setdefault(endpoint, error)
+
+
+def _multipart(fields, file_field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f'{value}\r\n'.encode())
+    body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+               f'filename="{filename}"\r\nContent-Type: video/mp4\r\n\r\n'.encode())
+    body.write(content)
+    body.write(f'\r\n--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def _request(base_url, method, path, body=None, content_type=None):
+    req = urllib.request.Request(base_url + path, data=body, method=method)
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return json.loads(response.read() or b'null')
+
+
+def virtual_user(base_url, user_id, mix, deadline, recorder, video_bytes, think_time, rng):
+    endpoints, weights = zip(*mix.items())
+    job_ids = []
+
+    while time.monotonic() < deadline:
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint == 'status' and not job_ids:
+            # Nothing to poll yet - upload instead, and report the swap
+            recorder.substitute('status', 'upload')
+            endpoint = 'upload'
+
+        if endpoint == 'upload':
+            body, content_type = _multipart(
+                {'user_id': user_id, 'frame_interval': 5}, 'video', 'clip.mp4', video_bytes)
+            call = ('POST', '/api/upload-video', body, content_type)
+        elif endpoint == 'status':
+            call = ('GET', f'/api/job-status/{rng.choice(job_ids)}', None, None)
+        else:
+            body = json.dumps({'query': rng.choice(SEARCH_QUERIES), 'user_id': user_id}).encode()
+            call = ('POST', '/api/search', body, 'application/json')
+
+        start = time.perf_counter()
+        error = None
+        try:
+            result = _request(base_url, *call)
+        except urllib.error.HTTPError as e:
+            error = f'HTTP {e.code}'
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        recorder.record(endpoint, time.perf_counter() - start, error)
+
+        if endpoint == 'upload' and error is None:
+            job_ids.append(result['job_id'])
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+
+
+# ==============================================================================
+# Runner & Report
+# ==============================================================================
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed):
+    report = {}
+    for endpoint in sorted(recorder.latencies):
+        latencies = sorted(recorder.latencies[endpoint])
+        count = len(latencies)
+        report[endpoint] = {
+            'requests': count,
+            'errors': recorder.errors[endpoint],
+            'error_rate': recorder.errors[endpoint] / count,
+            'throughput_rps': count / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+    return report
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        if name not in ('upload', 'status', 'search'):
+            raise argparse.ArgumentTypeError(f'Unknown endpoint in mix: {name}')
+        mix[name] = float(weight)
+    return mix
+
+
+def run_load_test(args):
+    # Throwaway job queue database, removed once the report is built
+    with tempfile.TemporaryDirectory(prefix='cctv-load-') as workdir:
+        return _run_load_test(args, os.path.join(workdir, 'jobs.db'))
+
+
+def _run_load_test(args, job_queue_db):
+    import production_architecture as pa
+    from job_queue import WorkerPool
+    from werkzeug.serving import make_server
+
+    users = [f'user-{i}' for i in range(args.users or args.concurrency)]
+    fakes = install_fakes(pa, args.queue_mode, job_queue_db, args.model_latency,
+                          args.frames_per_job, args.seed_logs, users)
+
+    # Per-request access logging would dominate the measurement
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, pa.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    workers = None
+    try:
+        if args.workers and args.queue_mode == 'local':
+            workers = WorkerPool(fakes.queue, pa.run_video_job, processes=args.workers,
+                                 poll_interval=0.05, use_threads=True).start()
+
+        recorder = Recorder()
+        video_bytes = os.urandom(args.video_kb * 1024)
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=virtual_user, args=(
+                base_url, users[i % len(users)], args.mix, deadline, recorder,
+                video_bytes, args.think_time, random.Random(args.seed + i)
+            ), daemon=True)
+            for i in range(args.concurrency)
+        ]
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if workers:
+            workers.stop(timeout=5)
+        server.shutdown()
+        fakes.restore()
+
+    report = {
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'elapsed_seconds': elapsed,
+        'endpoints': summarize(recorder, elapsed),
+        'error_samples': recorder.error_samples,
+        'substitutions': dict(recorder.substitutions),
+    }
+    if args.queue_mode == 'local':
+        report['job_queue'] = fakes.queue.stats()
+    else:
+        report['tasks_created'] = len(fakes.tasks.tasks)
+    return report
+
+
+def print_report(report):
+    config = report['config']
+    print(f"{config['concurrency']} virtual users, {report['elapsed_seconds']:.1f}s, "
+          f"mix {config['mix']}\n")
+    print(f"{'endpoint':<10}{'requests':>10}{'rps':>9}{'errors':>8}{'err %':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, s in report['endpoints'].items():
+        print(f"{endpoint:<10}{s['requests']:>10}{s['throughput_rps']:>9.1f}{s['errors']:>8}"
+              f"{s['error_rate'] * 100:>7.1f}%{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+    for endpoint, sample in report['error_samples'].items():
+        print(f'  first {endpoint} error: {sample}')
+    for swap, count in report['substitutions'].items():
+        print(f'  {swap}: {count} picks sent as a different endpoint (no job to poll yet)')
+
+    if 'tasks_created' in report:
+        print(f"\nCloud Tasks created (not dispatched): {report['tasks_created']}")
+    queue = report.get('job_queue')
+    if queue:
+        wait = queue['queue_wait_p95']
+        print(f"\nJob queue: {queue['counts']}, queue wait p95: "
+              f"{f'{wait:.2f}s' if wait is not None else 'n/a'}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Load test the Cloud Run API with local fakes')
+    parser.add_argument('--concurrency', type=int, default=20, help='Virtual users')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('upload=1,status=6,search=3'),
+                        help='Traffic weights, e.g. upload=1,status=6,search=3')
+    parser.add_argument('--queue-mode', choices=('local', 'cloud-tasks'),
+                        default=os.environ.get('JOB_QUEUE_MODE', 'local'),
+                        help='Job queue backend to exercise (default: $JOB_QUEUE_MODE or local)')
+    parser.add_argument('--users', type=int, default=0,
+                        help='Distinct user_ids (default: one per virtual user)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Job queue worker threads, local mode (0 = queue only)')
+    parser.add_argument('--model-latency', type=float, default=0.2,
+                        help='Fake Gemini seconds per frame')
+    parser.add_argument('--frames-per-job', type=int, default=12)
+    parser.add_argument('--seed-logs', type=int, default=200, help='Logs per user before start')
+    parser.add_argument('--video-kb', type=int, default=256, help='Upload size')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Mean pause between requests per user (seconds)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Also write the report as JSON')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+
+    report = run_load_test(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
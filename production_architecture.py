@@ -10,6 +10,7 @@ PRODUCTION ARCHITECTURE OVERVIEW
 2. CLOUD STORAGE (video stored)
    ↓
 3. CLOUD TASKS (queues processing job)
+   or LOCAL JOB QUEUE (SQLite + worker pool, see job_queue.py)
    ↓
 4. CLOUD RUN (processes video asynchronously)
    ↓
@@ -27,22 +28,69 @@ PRODUCTION ARCHITECTURE OVERVIEW
 # ==============================================================================
 
 from flask import Flask, request, jsonify
-from google.cloud import storage, firestore, tasks_v2
-import google.generativeai as genai
-import cv2
+import json
+import os
 import tempfile
+import uuid
 from datetime import datetime
 
+from frame_buffers import iter_sampled_frames
+from job_queue import JobQueue, WorkerPool
+from lazy_init import lazy_import, shared_client
+from structured_analysis import (
+    STRUCTURED_PROMPT, fallback_log_fields, parse_frame_analysis, to_log_fields
+)
+
+# Heavy modules load on first use, not at import (fast cold start)
+cv2 = lazy_import('cv2')
+tasks_v2 = lazy_import('google.cloud.tasks_v2')
+
 app = Flask(__name__)
 
-# Initialize clients
-storage_client = storage.Client()
-db = firestore.Client()
-tasks_client = tasks_v2.CloudTasksClient()
+# Clients are created lazily, once per process (see lazy_init.py)
+@shared_client
+def get_storage_client():
+    from google.cloud import storage
+    return storage.Client()
+
+
+@shared_client
+def get_firestore():
+    from google.cloud import firestore
+    return firestore.Client()
+
+
+@shared_client
+def get_tasks_client():
+    return tasks_v2.CloudTasksClient()
+
+
+@shared_client
+def get_model():
+    import google.generativeai as genai
+    # In production: use Secret Manager
+    genai.configure(api_key=os.environ.get('GEMINI_API_KEY', 'YOUR_API_KEY'))
+    return genai.GenerativeModel('gemini-2.0-flash-exp')
+
+
+# Job queue backend: 'cloud-tasks' (Cloud Run) or 'local' (self-hosted,
+# single host - run workers with `python job_queue.py`)
+JOB_QUEUE_MODE = os.environ.get('JOB_QUEUE_MODE', 'cloud-tasks')
+
+# Highest upload priority a client may request (0 = everyone equal)
+MAX_UPLOAD_PRIORITY = int(os.environ.get('MAX_UPLOAD_PRIORITY', 0))
+
+
+@shared_client
+def get_job_queue():
+    return JobQueue.from_env()
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe - touches no clients, so it stays fast on cold start"""
+    return jsonify({'status': 'ok'}), 200
 
-# Configure Gemini
-genai.configure(api_key="YOUR_API_KEY")  # In production: use Secret Manager
-model = genai.GenerativeModel('gemini-2.0-flash-exp')
 
 @app.route('/api/upload-video', methods=['POST'])
 def upload_video():
@@ -57,8 +105,19 @@ def upload_video():
     file = request.files['video']
     user_id = request.form.get('user_id')
     
+    # Validate the form before touching storage, so a 400 leaves no orphaned upload
+    try:
+        priority = int(request.form.get('priority', 0))
+    except ValueError:
+        return jsonify({'error': 'priority must be an integer'}), 400
+    # Clients only get the range the server allows, so nobody jumps the queue
+    priority = min(max(priority, 0), MAX_UPLOAD_PRIORITY)
+    
+    # Known before queueing, so log writes can be keyed by it (retry-safe)
+    job_id = uuid.uuid4().hex
+    
     # Upload to Cloud Storage
-    bucket = storage_client.bucket('cctv-videos')
+    bucket = get_storage_client().bucket('cctv-videos')
     blob = bucket.blob(f'{user_id}/{datetime.now().isoformat()}/{file.filename}')
     blob.upload_from_file(file)
     
@@ -66,12 +125,23 @@ def upload_video():
     
     # Create processing task (async)
     task = {
+        'job_id': job_id,
         'video_url': video_url,
         'user_id': user_id,
         'frame_interval': request.form.get('frame_interval', 5)
     }
     
+    if JOB_QUEUE_MODE == 'local':
+        # Self-hosted: durable local queue, drained by the worker pool
+        get_job_queue().enqueue(user_id, task, priority=priority, job_id=job_id)
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'video_url': video_url
+        }), 202
+    
     # Queue processing job
+    tasks_client = get_tasks_client()
     parent = tasks_client.queue_path('PROJECT_ID', 'LOCATION', 'video-processing-queue')
     task_config = {
         'http_request': {
@@ -82,10 +152,19 @@ def upload_video():
         }
     }
     
-    response = tasks_client.create_task(request={'parent': parent, 'task': task_config})
+    # Job document polled by /api/job-status and completed by /api/process-video
+    # (written first, so a fast task never finds it missing)
+    get_firestore().collection('jobs').document(job_id).set({
+        'user_id': user_id,
+        'video_url': video_url,
+        'status': 'queued',
+        'created_at': datetime.now()
+    })
+    
+    tasks_client.create_task(request={'parent': parent, 'task': task_config})
     
     return jsonify({
-        'job_id': response.name,
+        'job_id': job_id,
         'status': 'queued',
         'video_url': video_url
     }), 202
@@ -104,35 +183,61 @@ def process_video():
     - Updates job status
     """
     data = request.json
+    result = run_video_job(data)
+    
+    # Update job status
+    get_firestore().collection('jobs').document(data['job_id']).update({
+        'status': 'completed',
+        'total_frames': result['frames_processed'],
+        'completed_at': datetime.now()
+    })
+    
+    return jsonify({'status': 'completed', 'frames_processed': result['frames_processed']}), 200
+
+
+def run_video_job(data, report_progress=None):
+    """
+    Run the processing pipeline for one job
+    
+    Shared by the Cloud Tasks endpoint and the local worker pool.
+    report_progress(frames_done, total_frames) heartbeats before each slow
+    step and after each frame; it raises job_queue.LeaseLost if another
+    worker has taken over, which stops this run before its next frame.
+    
+    Both backends retry from frame 0, so each log is stored under
+    '{job_id}-{frame_number}': a retry overwrites the logs an earlier
+    attempt already wrote instead of adding duplicates.
+    """
+    job_id = data['job_id']
     video_url = data['video_url']
     user_id = data['user_id']
     frame_interval = int(data['frame_interval'])
+    heartbeat = report_progress or (lambda *args: None)
     
     # Download video to temp location
     with tempfile.NamedTemporaryFile(suffix='.mp4') as temp_file:
-        blob = storage_client.bucket('cctv-videos').blob(video_url.split('/')[-1])
+        heartbeat(0)
+        blob = get_storage_client().bucket('cctv-videos').blob(video_url.split('/')[-1])
         blob.download_to_filename(temp_file.name)
         
         # Extract frames
+        heartbeat(0)
         frames = extract_frames(temp_file.name, frame_interval)
+        heartbeat(0, len(frames))
         
         # Analyze each frame
         logs = []
-        for frame_data in frames:
+        logs_ref = get_firestore().collection('users').document(user_id).collection('logs')
+        for idx, frame_data in enumerate(frames):
             log_entry = analyze_frame_production(frame_data)
             logs.append(log_entry)
             
-            # Store in Firestore immediately
-            db.collection('users').document(user_id).collection('logs').add(log_entry)
-        
-        # Update job status
-        db.collection('jobs').document(data['job_id']).update({
-            'status': 'completed',
-            'total_frames': len(frames),
-            'completed_at': datetime.now()
-        })
+            # Store in Firestore immediately (fixed ID - retries overwrite)
+            logs_ref.document(f"{job_id}-{frame_data['frame_number']}").set(log_entry)
+            
+            heartbeat(idx + 1, len(frames))
     
-    return jsonify({'status': 'completed', 'frames_processed': len(logs)}), 200
+    return {'frames_processed': len(logs)}
 
 
 @app.route('/api/search', methods=['POST'])
@@ -152,7 +257,7 @@ def search_logs():
     # In production: Use Vertex AI Matching Engine for semantic search
     # This is a simplified version showing Firestore query
     
-    logs_ref = db.collection('users').document(user_id).collection('logs')
+    logs_ref = get_firestore().collection('users').document(user_id).collection('logs')
     
     # Simple text search (in production: use embedding-based search)
     results = []
@@ -175,8 +280,15 @@ def job_status(job_id):
     Endpoint: Check processing job status
     
     Allows frontend to poll for completion
+    Local mode includes progress percentage and ETA
     """
-    job_doc = db.collection('jobs').document(job_id).get()
+    if JOB_QUEUE_MODE == 'local':
+        status = get_job_queue().get_status(job_id)
+        if status is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(status), 200
+    
+    job_doc = get_firestore().collection('jobs').document(job_id).get()
     
     if job_doc.exists:
         return jsonify(job_doc.to_dict()), 200
@@ -186,9 +298,36 @@ def job_status(job_id):
 
 # Helper functions (same as prototype but optimized)
 def extract_frames(video_path, frame_interval):
-    """Extract frames - same logic as prototype"""
-    # Implementation here...
-    pass
+    """
+    Sample one frame every frame_interval seconds, JPEG-encoded for Gemini
+    
+    Decodes once via frame_buffers.iter_sampled_frames; each frame is
+    encoded straight from the reused BGR buffer, so only the JPEG bytes
+    are kept per frame.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError('Could not open video file')
+    
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if not fps:
+            raise ValueError('Video reports no frame rate')
+        
+        frames = []
+        for sampled in iter_sampled_frames(cap, fps * frame_interval, fps):
+            success, jpeg = cv2.imencode('.jpg', sampled.bgr)
+            if not success:
+                raise ValueError(f'Failed to encode frame {sampled.frame_number}')
+            frames.append({
+                'timestamp': sampled.timestamp,
+                'frame_number': sampled.frame_number,
+                'image': {'mime_type': 'image/jpeg', 'data': jpeg.tobytes()}
+            })
+    finally:
+        cap.release()
+    
+    return frames
 
 
 def analyze_frame_production(frame_data):
@@ -200,17 +339,11 @@ def analyze_frame_production(frame_data):
     - Retry logic
     - Error handling
     - Rate limiting
+    - Structured JSON output (no post-hoc entity parsing)
     """
     try:
-        # Same Gemini call as prototype
-        response = model.generate_content([prompt, frame_data['image']])
-        
-        return {
-            'timestamp': frame_data['timestamp'],
-            'description': response.text,
-            'entities': extract_entities(response.text),
-            'analyzed_at': datetime.now().isoformat()
-        }
+        response = get_model().generate_content([STRUCTURED_PROMPT, frame_data['image']])
+        text = response.text
     except Exception as e:
         # Production: Log error, retry, or mark for manual review
         return {
@@ -218,6 +351,19 @@ def analyze_frame_production(frame_data):
             'description': f'Error: {str(e)}',
             'status': 'failed'
         }
+    
+    try:
+        analysis, repaired = parse_frame_analysis(text)
+        fields = {**to_log_fields(analysis), 'repaired': repaired}
+    except ValueError as e:
+        # Unusable JSON - keep the model's text, same fallback as the prototype
+        fields = fallback_log_fields(text, error=e)
+    
+    return {
+        'timestamp': frame_data['timestamp'],
+        **fields,
+        'analyzed_at': datetime.now().isoformat()
+    }
 
 
 # ==============================================================================
@@ -234,18 +380,23 @@ FIRESTORE COLLECTIONS:
     │   ├── duration: 3600
     │   └── status: "processed"
     │
-    └── logs/{log_id}
+    └── logs/{job_id}-{frame_number}
         ├── video_id: "abc123"
         ├── timestamp: "00:05:23"
         ├── timestamp_seconds: 323
         ├── description: "Two people entering..."
         ├── entities: ["person", "door"]
+        ├── people_count: 2
+        ├── vehicles: []
+        ├── doors: ["main entrance open"]
+        ├── activities: ["entering"]
+        ├── anomaly: false
         └── analyzed_at: timestamp
 
 /jobs/{job_id}
     ├── user_id: "user123"
     ├── video_url: "gs://bucket/video.mp4"
-    ├── status: "processing" | "completed" | "failed"
+    ├── status: "queued" | "processing" | "completed" | "failed"
     ├── total_frames: 720
     └── created_at: timestamp
 """
@@ -372,4 +523,14 @@ rate_limits:
 """
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
+    workers = None
+    if JOB_QUEUE_MODE == 'local':
+        workers = WorkerPool(
+            get_job_queue(), run_video_job,
+            processes=int(os.environ.get('JOB_WORKERS', os.cpu_count() or 1))
+        ).start()
+    try:
+        app.run(host='0.0.0.0', port=8080)
+    finally:
+        if workers:
+            workers.stop()
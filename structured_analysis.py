@@ -0,0 +1,171 @@
+# Structured Frame Analysis - Schema-Validated JSON Instead of Free-Form Prose
+# The model fills a fixed schema, so no post-hoc keyword guessing is needed
+
+"""
+STRUCTURED ANALYSIS OVERVIEW
+============================
+
+1. STRUCTURED_PROMPT (compact - asks for JSON only)
+   ↓
+2. GEMINI RESPONSE (one JSON object per frame)
+   ↓
+3. parse_frame_analysis()
+   - Fast path: json.loads + type checks
+   - Repair path: strip code fences / surrounding text, trailing
+     commas, Python literals, then coerce field types
+   ↓
+4. to_log_fields() (fields map directly onto log entries / search index)
+   or fallback_log_fields() when the response is unusable (raw text +
+   keyword entities, as in prose mode)
+"""
+
+import json
+import re
+
+
+# Field name -> default value; types are enforced in validate_frame_analysis()
+FRAME_SCHEMA = {
+    'people_count': 0,
+    'vehicles': [],
+    'doors': [],
+    'activities': [],
+    'anomaly': False,
+    'summary': '',
+}
+
+LIST_FIELDS = ('vehicles', 'doors', 'activities')
+
+STRUCTURED_PROMPT = """CCTV frame. Reply with JSON only:
+{"people_count":int,"vehicles":[str],"doors":[str],"activities":[str],"anomaly":bool,"summary":str}
+Lists hold short phrases (e.g. "red sedan parking"), [] if none. doors: visible door/gate states or events.
+anomaly: true only for unusual security-relevant events. summary: one sentence, max 25 words."""
+
+# Keyword fallback for prose responses (and structured ones that can't be parsed)
+ENTITY_KEYWORDS = {
+    'person': ['person', 'people', 'man', 'woman', 'individual', 'pedestrian'],
+    'vehicle': ['car', 'vehicle', 'truck', 'bike', 'motorcycle', 'van'],
+    'door': ['door', 'entrance', 'exit', 'gate'],
+    'activity': ['walking', 'running', 'standing', 'sitting', 'entering', 'leaving']
+}
+
+_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+_PY_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+# String literals are matched first so fixes never touch text inside them
+_REPAIRABLE = re.compile(r'"(?:\\.|[^"\\])*"|,(\s*[}\]])|\b(True|False|None)\b')
+
+
+def parse_frame_analysis(text):
+    """
+    Parse and validate a structured model response
+
+    Returns (analysis, repaired) where repaired is True if the response
+    needed the repair path. Raises ValueError if nothing usable is found.
+    """
+    try:
+        return validate_frame_analysis(json.loads(text)), False
+    except (ValueError, TypeError):
+        pass
+
+    candidate = _FENCE.sub('', text)
+    start, end = candidate.find('{'), candidate.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError('No JSON object in response')
+    candidate = candidate[start:end + 1]
+    candidate = _REPAIRABLE.sub(_repair_token, candidate)
+
+    try:
+        data = json.loads(candidate)
+    except ValueError as e:
+        raise ValueError(f'Unrepairable JSON response: {e}') from None
+    return validate_frame_analysis(data), True
+
+
+def _repair_token(match):
+    trailing_comma, literal = match.groups()
+    if trailing_comma is not None:
+        return trailing_comma
+    if literal is not None:
+        return _PY_LITERALS[literal]
+    return match.group(0)
+
+
+def validate_frame_analysis(data):
+    """Check types against FRAME_SCHEMA, coercing near-misses and filling defaults"""
+    if not isinstance(data, dict):
+        raise ValueError('Structured response must be a JSON object')
+
+    analysis = {}
+
+    people = data.get('people_count', 0)
+    if isinstance(people, bool):
+        raise ValueError('people_count must be an integer')
+    try:
+        analysis['people_count'] = max(int(float(people or 0)), 0)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'people_count must be an integer, got {people!r}') from None
+
+    for field in LIST_FIELDS:
+        value = data.get(field) or []
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            raise ValueError(f'{field} must be a list of strings')
+        analysis[field] = [str(item).strip() for item in value if str(item).strip()]
+
+    anomaly = data.get('anomaly', False)
+    if isinstance(anomaly, str):
+        anomaly = anomaly.strip().lower() in ('true', 'yes', '1')
+    analysis['anomaly'] = bool(anomaly)
+
+    summary = data.get('summary') or ''
+    analysis['summary'] = str(summary).strip()
+
+    return analysis
+
+
+def to_log_fields(analysis):
+    """Map a validated analysis onto log entry fields"""
+    entities = []
+    if analysis['people_count']:
+        entities.append('person')
+    if analysis['vehicles']:
+        entities.append('vehicle')
+    if analysis['doors']:
+        entities.append('door')
+    if analysis['activities']:
+        entities.append('activity')
+    if analysis['anomaly']:
+        entities.append('anomaly')
+
+    return {
+        'description': analysis['summary'],
+        'entities': entities,
+        'people_count': analysis['people_count'],
+        'vehicles': analysis['vehicles'],
+        'doors': analysis['doors'],
+        'activities': analysis['activities'],
+        'anomaly': analysis['anomaly'],
+    }
+
+
+def extract_entities(description):
+    """Simple keyword extraction for entity recognition"""
+    description_lower = description.lower()
+    return [category for category, words in ENTITY_KEYWORDS.items()
+            if any(word in description_lower for word in words)]
+
+
+def fallback_log_fields(text, error=None):
+    """
+    Log fields for free-form text: kept verbatim, entities by keyword
+
+    error (why a structured response was rejected) is recorded as
+    structured_error, so rejections show up in the logs, not on stdout.
+    """
+    fields = {
+        'description': text,
+        'entities': extract_entities(text),
+    }
+    if error is not None:
+        fields['structured_error'] = str(error)
+    return fields
@@ -0,0 +1,72 @@
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+np = pytest.importorskip('numpy')
+
+from benchmark_frames import write_synthetic_video
+from frame_buffers import FrameBuffers, iter_sampled_frames
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(path, seconds=2, fps=10, size=(640, 480))
+    return path
+
+
+def sample(clip, interval_frames, buffers, visit):
+    cap = cv2.VideoCapture(clip)
+    try:
+        for frame in iter_sampled_frames(cap, interval_frames, cap.get(cv2.CAP_PROP_FPS), buffers):
+            visit(frame)
+    finally:
+        cap.release()
+
+
+def test_sampling_follows_interval(clip):
+    seen = []
+    sample(clip, 5, FrameBuffers(),
+           lambda frame: seen.append((frame.frame_number, frame.timestamp)))
+
+    assert seen == [(0, 0.0), (5, 0.5), (10, 1.0), (15, 1.5)]
+
+
+def test_views_reuse_the_same_buffers(clip):
+    buffers = FrameBuffers(small_width=80)
+    arrays = []
+    sample(clip, 5, buffers, lambda frame: arrays.append(
+        (frame.bgr, frame.gray_small(), frame.rgb())))
+
+    bgr, gray, rgb = arrays[0]
+    assert gray.shape == (60, 80)
+    assert rgb.shape == bgr.shape == (480, 640, 3)
+    for later in arrays[1:]:
+        assert later[0] is bgr
+        assert later[1] is gray
+        assert later[2] is rgb
+    # bgr, small_bgr, gray_small, rgb - once each for the whole video
+    assert buffers.allocations == 4
+
+
+def test_views_are_lazy(clip):
+    buffers = FrameBuffers()
+    sample(clip, 5, buffers, lambda frame: frame.gray_small())
+
+    assert buffers.peek('rgb') is None
+
+
+def test_next_frame_overwrites_views(clip):
+    kept = []
+
+    def visit(frame):
+        rgb = frame.rgb()
+        if kept:
+            old_view, old_copy = kept[-1]
+            # The previous frame's view now shows this frame
+            assert old_view is rgb
+            assert not np.array_equal(old_view, old_copy)
+        kept.append((rgb, rgb.copy()))
+
+    sample(clip, 5, FrameBuffers(), visit)
+
+    assert len(kept) == 4
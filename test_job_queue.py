@@ -0,0 +1,165 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from job_queue import COMPLETED, FAILED, QUEUED, RUNNING, JobQueue, _worker_loop
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / 'jobs.db', visibility_timeout=60, max_attempts=2,
+                    max_jobs_per_user=1, retry_backoff=0)
+
+
+def test_claim_order_priority_then_fifo(queue):
+    low = queue.enqueue('a', {'n': 1}, priority=0)
+    high_first = queue.enqueue('b', {'n': 2}, priority=5)
+    high_second = queue.enqueue('c', {'n': 3}, priority=5)
+
+    claimed = [queue.claim('w')[0] for _ in range(3)]
+
+    assert claimed == [high_first, high_second, low]
+    assert queue.claim('w') is None
+
+
+def test_per_user_cap(queue):
+    first = queue.enqueue('alice', {})
+    queue.enqueue('alice', {})
+    other = queue.enqueue('bob', {})
+
+    assert queue.claim('w1')[0] == first
+    # alice is at her limit of 1 running job, so bob's later job goes next
+    assert queue.claim('w2')[0] == other
+    assert queue.claim('w3') is None
+
+    queue.complete(first, 'w1', {'ok': True})
+    assert queue.claim('w3') is not None
+
+
+def test_expired_lease_is_requeued_and_old_worker_is_fenced(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', visibility_timeout=0.05,
+                     max_attempts=3, retry_backoff=0)
+    job_id = queue.enqueue('a', {})
+    assert queue.claim('slow')[0] == job_id
+
+    time.sleep(0.1)
+    assert queue.claim('fast')[0] == job_id
+
+    status = queue.get_status(job_id)
+    assert status['status'] == RUNNING
+    assert status['attempts'] == 2
+    # The original worker lost its lease and can no longer touch the job
+    assert queue.update_progress(job_id, 'slow', 1, 10) is False
+    assert queue.complete(job_id, 'slow', {}) is False
+    assert queue.complete(job_id, 'fast', {'ok': True}) is True
+    assert queue.get_status(job_id)['status'] == COMPLETED
+
+
+def test_failure_retries_then_gives_up(queue):
+    job_id = queue.enqueue('a', {})
+
+    queue.claim('w')
+    assert queue.fail(job_id, 'w', 'boom 1')
+    status = queue.get_status(job_id)
+    assert status['status'] == QUEUED
+    assert status['error'] == 'boom 1'
+
+    queue.claim('w')
+    assert queue.fail(job_id, 'w', 'boom 2')
+    status = queue.get_status(job_id)
+    assert status['status'] == FAILED
+    assert status['attempts'] == 2
+    assert queue.claim('w') is None
+
+
+def test_retry_backoff_delays_next_claim(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', retry_backoff=60)
+    job_id = queue.enqueue('a', {})
+    queue.claim('w')
+    queue.fail(job_id, 'w', 'boom')
+
+    assert queue.get_status(job_id)['status'] == QUEUED
+    assert queue.claim('w') is None
+
+
+def test_expired_lease_counts_toward_max_attempts(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', visibility_timeout=0.05,
+                     max_attempts=1, retry_backoff=0)
+    job_id = queue.enqueue('a', {})
+    queue.claim('w')
+
+    time.sleep(0.1)
+    assert queue.claim('w') is None
+    status = queue.get_status(job_id)
+    assert status['status'] == FAILED
+    assert status['error'] == 'Visibility timeout expired'
+
+
+def test_progress_and_eta(queue):
+    job_id = queue.enqueue('a', {})
+    queue.claim('w')
+    assert queue.update_progress(job_id, 'w', 5, 20)
+
+    status = queue.get_status(job_id)
+    assert status['progress'] == 25.0
+    assert status['eta_seconds'] is not None
+
+    queue.complete(job_id, 'w', {'frames_processed': 20})
+    status = queue.get_status(job_id)
+    assert status['progress'] == 100.0
+    assert status['result'] == {'frames_processed': 20}
+
+
+def test_worker_abandons_job_when_lease_lost(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', visibility_timeout=0.05, retry_backoff=0)
+    job_id = queue.enqueue('a', {})
+    stop = threading.Event()
+    wrote_after_loss = []
+
+    def handler(payload, report_progress):
+        time.sleep(0.1)  # slow step outlives the lease
+        queue.claim('thief')
+        stop.set()
+        report_progress(1, 2)
+        wrote_after_loss.append(True)
+
+    _worker_loop(queue, handler, 'slow', stop, poll_interval=0.01)
+
+    assert wrote_after_loss == []
+    status = queue.get_status(job_id)
+    # Not failed or completed by the slow worker - the new owner still has it
+    assert status['status'] == RUNNING
+    assert status['attempts'] == 2
+    assert queue.complete(job_id, 'thief', {'ok': True})
+
+
+def test_worker_survives_queue_errors(queue, caplog):
+    job_id = queue.enqueue('a', {})
+    stop = threading.Event()
+    real_claim, real_complete = queue.claim, queue.complete
+    calls = {'claim': 0, 'complete': 0}
+
+    def flaky_claim(worker_id):
+        calls['claim'] += 1
+        if calls['claim'] == 1:
+            raise sqlite3.OperationalError('database is locked')
+        return real_claim(worker_id)
+
+    def flaky_complete(job_id, worker_id, result=None):
+        calls['complete'] += 1
+        stop.set()
+        raise sqlite3.OperationalError('database is locked')
+
+    queue.claim, queue.complete = flaky_claim, flaky_complete
+    _worker_loop(queue, lambda payload, report_progress: {'ok': True}, 'w', stop,
+                 poll_interval=0.001)
+
+    assert calls == {'claim': 2, 'complete': 1}
+    assert 'could not claim' in caplog.text
+    assert 'could not record the outcome' in caplog.text
+    # Still leased to w - the lease expiring will requeue it
+    assert queue.get_status(job_id)['status'] == RUNNING
+    queue.complete = real_complete
+    assert queue.complete(job_id, 'w', {'ok': True})
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('werkzeug')
+
+import production_architecture as pa
+from load_test import PATCHED, build_parser, run_load_test
+
+
+@pytest.mark.parametrize('queue_mode', ['local', 'cloud-tasks'])
+def test_smoke_run_has_no_errors_and_restores_globals(queue_mode):
+    originals = {name: getattr(pa, name) for name in PATCHED}
+    environ = dict(os.environ)
+    args = build_parser().parse_args([
+        '--queue-mode', queue_mode, '--duration', '1', '--concurrency', '4',
+        '--workers', '2', '--model-latency', '0.001', '--frames-per-job', '2',
+        '--seed-logs', '5', '--video-kb', '1',
+    ])
+
+    report = run_load_test(args)
+
+    assert report['error_samples'] == {}
+    assert set(report['endpoints']) == {'upload', 'status', 'search'}
+    assert all(s['errors'] == 0 for s in report['endpoints'].values())
+    if queue_mode == 'local':
+        assert report['job_queue']['counts']['failed'] == 0
+    else:
+        assert report['tasks_created'] == report['endpoints']['upload']['requests']
+
+    assert {name: getattr(pa, name) for name in PATCHED} == originals
+    assert dict(os.environ) == environ
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('flask')
+cv2 = pytest.importorskip('cv2')
+np = pytest.importorskip('numpy')
+
+import production_architecture as pa
+from benchmark_frames import write_synthetic_video
+from load_test import FakeFirestore, FakeModel, FakeStorageClient
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / 'clip.mp4')
+    write_synthetic_video(path, seconds=3, fps=10, size=(320, 240))
+    return path
+
+
+def test_extract_frames_samples_jpegs_every_interval(clip):
+    frames = pa.extract_frames(clip, 1)
+
+    assert [f['frame_number'] for f in frames] == [0, 10, 20]
+    assert [f['timestamp'] for f in frames] == [0.0, 1.0, 2.0]
+    assert all(f['image']['mime_type'] == 'image/jpeg' for f in frames)
+    # Each frame keeps its own bytes, not a view of the reused decode buffer
+    decoded = cv2.imdecode(np.frombuffer(frames[0]['image']['data'], np.uint8),
+                           cv2.IMREAD_COLOR)
+    assert decoded.shape == (240, 320, 3)
+
+
+def test_extract_frames_rejects_unreadable_video(tmp_path):
+    path = tmp_path / 'broken.mp4'
+    path.write_bytes(b'not a video')
+
+    with pytest.raises(ValueError):
+        pa.extract_frames(str(path), 1)
+
+
+def test_retried_job_overwrites_its_logs(clip, monkeypatch):
+    storage, db = FakeStorageClient(), FakeFirestore()
+    with open(clip, 'rb') as f:
+        storage.bucket('cctv-videos').blob('clip.mp4').upload_from_file(f)
+    monkeypatch.setattr(pa, 'get_storage_client', lambda: storage)
+    monkeypatch.setattr(pa, 'get_firestore', lambda: db)
+    monkeypatch.setattr(pa, 'get_model', lambda: FakeModel(0))
+
+    job = {'job_id': 'job1', 'user_id': 'u', 'frame_interval': 1,
+           'video_url': 'https://storage.googleapis.com/cctv-videos/clip.mp4'}
+    assert pa.run_video_job(job) == {'frames_processed': 3}
+    assert pa.run_video_job(job) == {'frames_processed': 3}
+
+    logs = list(db.collection('users').document('u').collection('logs').stream())
+    assert sorted(doc.id for doc in logs) == ['job1-0', 'job1-10', 'job1-20']
+
+
+def test_unparseable_response_keeps_model_text(monkeypatch):
+    model = SimpleNamespace(generate_content=lambda contents: SimpleNamespace(
+        text='I see a person walking near the door'))
+    monkeypatch.setattr(pa, 'get_model', lambda: model)
+
+    log_entry = pa.analyze_frame_production({'timestamp': 5, 'image': None})
+
+    assert log_entry['description'] == 'I see a person walking near the door'
+    assert log_entry['entities'] == ['person', 'door', 'activity']
+    assert 'status' not in log_entry
+    assert log_entry['structured_error'].startswith('No JSON object')
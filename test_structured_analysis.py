@@ -0,0 +1,80 @@
+import pytest
+
+from structured_analysis import fallback_log_fields, parse_frame_analysis, to_log_fields
+
+
+def test_valid_response_takes_fast_path():
+    analysis, repaired = parse_frame_analysis(
+        '{"people_count":2,"vehicles":["van"],"doors":[],"activities":["walking"],'
+        '"anomaly":false,"summary":"Two people walk past a van."}'
+    )
+
+    assert repaired is False
+    assert analysis['people_count'] == 2
+    assert analysis['vehicles'] == ['van']
+
+
+def test_repairs_fences_trailing_commas_and_python_literals():
+    analysis, repaired = parse_frame_analysis(
+        'Here you go:\n```json\n{"people_count": 1, "vehicles": ["car",], '
+        '"anomaly": True, "summary": None,}\n```'
+    )
+
+    assert repaired is True
+    assert analysis['vehicles'] == ['car']
+    assert analysis['anomaly'] is True
+    assert analysis['summary'] == ''
+
+
+def test_repair_leaves_string_contents_alone():
+    analysis, repaired = parse_frame_analysis(
+        '{"people_count": 0, "doors": ["True north gate, ]"], "anomaly": False,'
+        ' "summary": "None visible, }",}'
+    )
+
+    assert repaired is True
+    assert analysis['doors'] == ['True north gate, ]']
+    assert analysis['summary'] == 'None visible, }'
+
+
+def test_coerces_near_miss_types():
+    analysis, _ = parse_frame_analysis(
+        '{"people_count":"3","vehicles":"truck","anomaly":"yes","summary":"x"}'
+    )
+
+    assert analysis['people_count'] == 3
+    assert analysis['vehicles'] == ['truck']
+    assert analysis['anomaly'] is True
+
+
+@pytest.mark.parametrize('text', [
+    'no json here',
+    '{"people_count": 1e999}',
+    '{"people_count": NaN}',
+    '{"people_count": true}',
+    '{"vehicles": {"a": 1}}',
+    '[1, 2]',
+])
+def test_unusable_responses_raise_value_error(text):
+    with pytest.raises(ValueError):
+        parse_frame_analysis(text)
+
+
+def test_log_fields_entities():
+    analysis, _ = parse_frame_analysis(
+        '{"people_count":1,"doors":["gate open"],"anomaly":true,"summary":"s"}'
+    )
+
+    fields = to_log_fields(analysis)
+
+    assert fields['description'] == 's'
+    assert fields['entities'] == ['person', 'door', 'anomaly']
+
+
+def test_fallback_keeps_raw_text_and_keyword_entities():
+    fields = fallback_log_fields('A man opens the gate next to a parked van')
+
+    assert fields['description'] == 'A man opens the gate next to a parked van'
+    assert fields['entities'] == ['person', 'vehicle', 'door']
+    assert 'structured_error' not in fields
+    assert fallback_log_fields('x', error=ValueError('bad'))['structured_error'] == 'bad'